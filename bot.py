@@ -1,7 +1,15 @@
 import asyncio
 import os
+import re
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+from itertools import islice
 import aiohttp
-import json
+import orjson
+from dataclasses import dataclass, field
+from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 import logging
@@ -14,66 +22,394 @@ logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s
 logger = logging.getLogger(__name__)
 
 # File paths for persistence
+ALERTS_DB = 'alerts.db'
+# Legacy JSON store, imported into the database on first start
 ALERTS_FILE = 'active_alerts.json'
 
-# Store active alerts: {chat_id: {alert_id: {'symbol': str, 'target': price, 'initial': price, 'last_price': price, 'exchange': str}}}
+@dataclass(slots=True)
+class Alert:
+    """A price alert for one symbol on one exchange"""
+    symbol: str
+    target: float
+    initial: float
+    last_price: float
+    exchange: str
+    # Monotonic time of the next price check (not persisted)
+    next_check: float = 0.0
+    # Display forms computed once at creation (not persisted)
+    exchange_display: str = field(init=False, repr=False)
+    url_symbol: str = field(init=False, repr=False)
+    
+    def __post_init__(self):
+        self.exchange_display = self.exchange.upper()
+        # MEXC uses underscore format for futures
+        self.url_symbol = self.symbol.replace('USDT', '_USDT') if self.exchange == 'mexc' else self.symbol
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Alert':
+        """Build an alert from its persisted dict"""
+        return cls(
+            symbol=data['symbol'],
+            target=data['target'],
+            initial=data['initial'],
+            last_price=data.get('last_price', data['initial']),
+            exchange=data['exchange']
+        )
+
+# Store active alerts: {chat_id: {alert_id: Alert}}
 active_alerts = {}
 
+# Polling cadence: alerts closer to their target are checked more often
+POLL_INTERVAL = 2
+NEAR_TARGET_DISTANCE = 0.005
+MID_TARGET_DISTANCE = 0.05
+NEAR_TARGET_INTERVAL = 2
+MID_TARGET_INTERVAL = 10
+FAR_TARGET_INTERVAL = 60
+
+# Minimum symbols on one exchange before polling its bulk ticker instead of point requests
+BULK_MIN_SYMBOLS = 2
+
+# Exchange ticker endpoints, formatted with the exchange symbol
+BINANCE_URL = "https://fapi.binance.com/fapi/v1/ticker/price?symbol={}".format
+BYBIT_URL = "https://api.bybit.com/v5/market/tickers?category=linear&symbol={}".format
+BITGET_URL = "https://api.bitget.com/api/v2/mix/market/ticker?symbol={}&productType=USDT-FUTURES".format
+MEXC_URL = "https://contract.mexc.com/api/v1/contract/ticker?symbol={}".format
+
+# Lightweight endpoints used to warm DNS and connections at startup
+WARM_UP_TIMEOUT = 3
+EXCHANGE_PING_URLS = {
+    'binance': "https://fapi.binance.com/fapi/v1/ping",
+    'bybit': "https://api.bybit.com/v5/market/time",
+    'bitget': "https://api.bitget.com/api/v2/public/time",
+    'mexc': "https://contract.mexc.com/api/v1/contract/ping"
+}
+
+# Exchange circle emojis (matching colors)
+EXCHANGE_EMOJIS = {
+    'binance': '🟡',  # Yellow circle
+    'bybit': '🟠',    # Orange circle
+    'bitget': '🌐',   # Globe for Bitget
+    'mexc': '🔵'      # Blue circle
+}
+
+# Exchange trading pages, formatted with the exchange symbol
+EXCHANGE_URL_TEMPLATES = {
+    'binance': "https://www.binance.com/en/futures/{}",
+    'bybit': "https://www.bybit.com/trade/usdt/{}",
+    'bitget': "https://www.bitget.com/en/futures/usdt/{}",
+    'mexc': "https://futures.mexc.com/exchange/{}"
+}
+
+# Reverse index of alert IDs by symbol: {chat_id: {symbol: {alert_id}}}
+_symbol_index = {}
+
+# Alerts grouped by what they watch: {(symbol, exchange): {(chat_id, alert_id)}}
+_by_pair = {}
+
+# Exchange selection buttons shown when no exchange is given
+EXCHANGE_SELECT_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("Binance", callback_data="exchange_binance"),
+        InlineKeyboardButton("Bybit", callback_data="exchange_bybit")
+    ],
+    [
+        InlineKeyboardButton("Bitget", callback_data="exchange_bitget"),
+        InlineKeyboardButton("MEXC", callback_data="exchange_mexc")
+    ]
+])
+
+# Alert request: SYMBOL PRICE [EXCHANGE]
+ALERT_MESSAGE_RE = re.compile(r'(\S+)\s+(\S+)(?:\s+(\S+))?')
+
 # Store pending alerts (waiting for exchange selection): {chat_id: {'symbol': str, 'target': float}}
 pending_alerts = {}
 
 # Alert ID counter
 alert_counter = 0
 
+# Database connection and alerts changed since the last write: {(chat_id, alert_id)}
+_db: Optional[sqlite3.Connection] = None
+_changed = set()
+_write_lock = asyncio.Lock()
+
+# Short-lived price cache: {(symbol, exchange): (price, expires_at)}
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "5"))
+_price_cache = {}
+
+# Outstanding price requests shared by concurrent callers: {(symbol, exchange): Task}
+_inflight = {}
+
+# Retry policy for exchange requests
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.25
+MAX_RETRY_AFTER = 10
+
+# Limit concurrent requests per exchange
+MAX_CONCURRENCY = int(os.getenv("MAX_CONCURRENCY", "8"))
+_semaphores = {exchange: asyncio.Semaphore(MAX_CONCURRENCY) for exchange in ('binance', 'bybit', 'bitget', 'mexc')}
+
+# Shared HTTP session for all exchange requests (created lazily, closed on shutdown)
+_session: Optional[aiohttp.ClientSession] = None
+
+# Background connection warm-up started by post_init (cancelled on shutdown if still running)
+_warm_up_task: Optional[asyncio.Task] = None
+
+def get_resolver() -> Optional[aiohttp.AsyncResolver]:
+    """Resolve DNS on the event loop via aiodns when it is installed"""
+    try:
+        import aiodns  # noqa: F401
+    except ImportError:
+        return None
+    return aiohttp.AsyncResolver()
+
+async def get_session() -> aiohttp.ClientSession:
+    """Return the shared aiohttp session, creating it on first use"""
+    global _session
+    
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=10,
+            resolver=get_resolver(),
+            use_dns_cache=True,
+            ttl_dns_cache=600,
+            keepalive_timeout=60,
+            enable_cleanup_closed=True
+        )
+        timeout = aiohttp.ClientTimeout(total=10, connect=3)
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            trust_env=False,
+            json_serialize=lambda obj: orjson.dumps(obj).decode()
+        )
+    return _session
+
+async def close_session():
+    """Close the shared aiohttp session"""
+    global _session
+    
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def open_db() -> sqlite3.Connection:
+    """Open the alerts database, creating the schema if needed"""
+    db = sqlite3.connect(ALERTS_DB, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.execute(
+        "CREATE TABLE IF NOT EXISTS alerts ("
+        "chat_id INTEGER, alert_id TEXT, symbol TEXT, exchange TEXT, "
+        "target REAL, initial REAL, last_price REAL, "
+        "PRIMARY KEY (chat_id, alert_id))"
+    )
+    db.execute("CREATE INDEX IF NOT EXISTS ix_pair ON alerts (symbol, exchange)")
+    db.commit()
+    return db
+
+def import_alerts_file():
+    """Copy alerts from the legacy JSON file into the database"""
+    with open(ALERTS_FILE, 'rb') as f:
+        data = orjson.loads(f.read())
+    
+    rows = []
+    for chat_id, alerts in data.items():
+        for alert_id, alert_data in alerts.items():
+            alert = Alert.from_dict(alert_data)
+            rows.append(alert_row(int(chat_id), alert_id, alert))
+    write_rows(rows, [])
+    logger.info(f"Imported {len(rows)} alerts from {ALERTS_FILE}")
+
 def load_data():
-    """Load alerts from file"""
-    global active_alerts, alert_counter
+    """Load alerts from the database"""
+    global _db, active_alerts, alert_counter
     
-    # Load active alerts
-    if os.path.exists(ALERTS_FILE):
-        try:
-            with open(ALERTS_FILE, 'r') as f:
-                data = json.load(f)
-                # Convert string keys back to integers
-                active_alerts = {int(k): v for k, v in data.items()}
-            
-            # Set alert_counter to max existing ID + 1
-            max_id = 0
-            for alerts in active_alerts.values():
-                for alert_id in alerts.keys():
-                    try:
-                        max_id = max(max_id, int(alert_id))
-                    except:
-                        pass
-            alert_counter = max_id + 1
-            
-            logger.info(f"Loaded {len(active_alerts)} active alerts from file")
-        except Exception as e:
-            logger.error(f"Error loading alerts: {e}")
-            active_alerts = {}
+    # Without a database alerts cannot be persisted, so let startup fail
+    _db = open_db()
+    
+    try:
+        # Migrate from the JSON file once; user_version records that it ran
+        if _db.execute("PRAGMA user_version").fetchone()[0] < 1:
+            if os.path.exists(ALERTS_FILE) and not _db.execute("SELECT 1 FROM alerts LIMIT 1").fetchone():
+                import_alerts_file()
+            _db.execute("PRAGMA user_version = 1")
+            _db.commit()
+        
+        # Alert IDs come from an increasing counter, so this keeps insertion order
+        rows = _db.execute(
+            "SELECT chat_id, alert_id, symbol, target, initial, last_price, exchange "
+            "FROM alerts ORDER BY chat_id, CAST(alert_id AS INTEGER)"
+        )
+        active_alerts = {}
+        for chat_id, alert_id, symbol, target, initial, last_price, exchange in rows:
+            active_alerts.setdefault(chat_id, {})[alert_id] = Alert(symbol, target, initial, last_price, exchange)
+        rebuild_indexes()
+        
+        # Set alert_counter to max existing ID + 1
+        alert_counter = 1 + max(
+            (int(alert_id) for alerts in active_alerts.values() for alert_id in alerts if alert_id.isdigit()),
+            default=0
+        )
+        
+        logger.info(f"Loaded {len(active_alerts)} active alerts from database")
+    except Exception as e:
+        logger.error(f"Error loading alerts: {e}")
+        active_alerts = {}
+
+def index_alert(chat_id: int, alert_id: str, alert: Alert):
+    """Add an alert to the symbol and pair indexes"""
+    _symbol_index.setdefault(chat_id, {}).setdefault(alert.symbol, set()).add(alert_id)
+    _by_pair.setdefault((alert.symbol, alert.exchange), set()).add((chat_id, alert_id))
+
+def rebuild_indexes():
+    """Rebuild the symbol and pair indexes from active alerts"""
+    _symbol_index.clear()
+    _by_pair.clear()
+    for chat_id, alerts in active_alerts.items():
+        for alert_id, alert in alerts.items():
+            index_alert(chat_id, alert_id, alert)
+
+def add_alert(chat_id: int, alert_id: str, alert: Alert):
+    """Store an alert and index it"""
+    active_alerts.setdefault(chat_id, {})[alert_id] = alert
+    index_alert(chat_id, alert_id, alert)
+    _changed.add((chat_id, alert_id))
+
+def delete_alert(chat_id: int, alert_id: str) -> Optional[Alert]:
+    """Remove an alert and its index entries, returning the removed alert"""
+    alert = active_alerts.get(chat_id, {}).pop(alert_id, None)
+    if alert is None:
+        return None
+    _changed.add((chat_id, alert_id))
+    
+    symbols = _symbol_index.get(chat_id, {})
+    alert_ids = symbols.get(alert.symbol)
+    if alert_ids is not None:
+        alert_ids.discard(alert_id)
+        if not alert_ids:
+            del symbols[alert.symbol]
+    
+    pair = (alert.symbol, alert.exchange)
+    owners = _by_pair.get(pair)
+    if owners is not None:
+        owners.discard((chat_id, alert_id))
+        if not owners:
+            del _by_pair[pair]
+    return alert
+
+def alert_row(chat_id: int, alert_id: str, alert: Alert) -> tuple:
+    """Convert an alert to a database row"""
+    return (chat_id, alert_id, alert.symbol, alert.exchange, alert.target, alert.initial, alert.last_price)
 
-def save_alerts():
-    """Save active alerts to file"""
+def write_rows(upserts: list, deletes: list):
+    """Apply alert changes to the database in one transaction (may run in a worker thread)"""
+    with _db:
+        _db.executemany(
+            "INSERT INTO alerts (chat_id, alert_id, symbol, exchange, target, initial, last_price) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (chat_id, alert_id) DO UPDATE SET "
+            "symbol = excluded.symbol, exchange = excluded.exchange, target = excluded.target, "
+            "initial = excluded.initial, last_price = excluded.last_price",
+            upserts
+        )
+        _db.executemany("DELETE FROM alerts WHERE chat_id = ? AND alert_id = ?", deletes)
+
+async def write_alerts():
+    """Write changed alerts to the database without blocking the event loop"""
+    global _changed
+    
+    # Build rows on the event loop so the snapshot is consistent
+    changed, _changed = _changed, set()
+    upserts = []
+    deletes = []
+    for chat_id, alert_id in changed:
+        alert = active_alerts.get(chat_id, {}).get(alert_id)
+        if alert is None:
+            deletes.append((chat_id, alert_id))
+        else:
+            upserts.append(alert_row(chat_id, alert_id, alert))
+    
     try:
-        with open(ALERTS_FILE, 'w') as f:
-            json.dump(active_alerts, f, indent=2)
-        logger.info("Saved active alerts to file")
+        async with _write_lock:
+            await asyncio.to_thread(write_rows, upserts, deletes)
+        logger.debug(f"Saved {len(upserts)} and deleted {len(deletes)} alerts")
     except Exception as e:
+        # Retry on the next flush
+        _changed |= changed
         logger.error(f"Error saving alerts: {e}")
 
+async def flush_alerts(context: ContextTypes.DEFAULT_TYPE):
+    """Background task to write alerts to the database when they have changed"""
+    if _changed:
+        await write_alerts()
+
+async def fetch_json(exchange: str, url: str):
+    """GET a JSON document from an exchange, retrying rate limits and transient errors"""
+    session = await get_session()
+    
+    async with _semaphores[exchange]:
+        for attempt in range(MAX_RETRIES):
+            delay = RETRY_BACKOFF * 2 ** attempt
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return orjson.loads(await response.read())
+                    
+                    # Only rate limits and server errors are worth retrying
+                    if response.status != 429 and response.status < 500:
+                        return None
+                    
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = max(delay, int(retry_after))
+                    if delay > MAX_RETRY_AFTER:
+                        return None
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == MAX_RETRIES - 1:
+                    raise
+            
+            if attempt < MAX_RETRIES - 1:
+                await asyncio.sleep(delay)
+    return None
+
+@lru_cache(maxsize=1024)
+def _normalize_symbol(symbol: str) -> str:
+    """Append USDT to the symbol if not present"""
+    return symbol if symbol.endswith('USDT') else f"{symbol}USDT"
+
+@lru_cache(maxsize=1024)
+def _binance_url(symbol: str) -> str:
+    """Build the Binance ticker URL for a symbol"""
+    return BINANCE_URL(_normalize_symbol(symbol))
+
+@lru_cache(maxsize=1024)
+def _bybit_url(symbol: str) -> str:
+    """Build the Bybit ticker URL for a symbol"""
+    return BYBIT_URL(_normalize_symbol(symbol))
+
+@lru_cache(maxsize=1024)
+def _bitget_url(symbol: str) -> str:
+    """Build the Bitget ticker URL for a symbol"""
+    return BITGET_URL(_normalize_symbol(symbol))
+
+@lru_cache(maxsize=1024)
+def _mexc_url(symbol: str) -> str:
+    """Build the MEXC ticker URL for a symbol"""
+    # MEXC uses underscore format for futures
+    return MEXC_URL(_normalize_symbol(symbol).replace('USDT', '_USDT'))
+
+def format_price(price: float) -> str:
+    """Format a price for display as a plain decimal, without trailing zeros"""
+    return f"${price:,.8f}".rstrip('0').rstrip('.')
+
 async def get_binance_price(symbol: str) -> float:
     """Fetch current price from Binance Futures API"""
     try:
-        if not symbol.endswith('USDT'):
-            symbol = f"{symbol}USDT"
-        
-        url = f"https://fapi.binance.com/fapi/v1/ticker/price?symbol={symbol}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if 'price' in data:
-                        return float(data['price'])
+        data = await fetch_json('binance', _binance_url(symbol))
+        if data and 'price' in data:
+            return float(data['price'])
         return None
     except Exception as e:
         logger.error(f"Error fetching Binance price for {symbol}: {e}")
@@ -82,16 +418,9 @@ async def get_binance_price(symbol: str) -> float:
 async def get_bybit_price(symbol: str) -> float:
     """Fetch current price from Bybit API"""
     try:
-        if not symbol.endswith('USDT'):
-            symbol = f"{symbol}USDT"
-        
-        url = f"https://api.bybit.com/v5/market/tickers?category=linear&symbol={symbol}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('retCode') == 0 and data.get('result', {}).get('list'):
-                        return float(data['result']['list'][0]['lastPrice'])
+        data = await fetch_json('bybit', _bybit_url(symbol))
+        if data and data.get('retCode') == 0 and data.get('result', {}).get('list'):
+            return float(data['result']['list'][0]['lastPrice'])
         return None
     except Exception as e:
         logger.error(f"Error fetching Bybit price for {symbol}: {e}")
@@ -100,16 +429,9 @@ async def get_bybit_price(symbol: str) -> float:
 async def get_bitget_price(symbol: str) -> float:
     """Fetch current price from Bitget API"""
     try:
-        if not symbol.endswith('USDT'):
-            symbol = f"{symbol}USDT"
-        
-        url = f"https://api.bitget.com/api/v2/mix/market/ticker?symbol={symbol}&productType=USDT-FUTURES"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('code') == '00000' and data.get('data'):
-                        return float(data['data'][0]['lastPr'])
+        data = await fetch_json('bitget', _bitget_url(symbol))
+        if data and data.get('code') == '00000' and data.get('data'):
+            return float(data['data'][0]['lastPr'])
         return None
     except Exception as e:
         logger.error(f"Error fetching Bitget price for {symbol}: {e}")
@@ -118,37 +440,117 @@ async def get_bitget_price(symbol: str) -> float:
 async def get_mexc_price(symbol: str) -> float:
     """Fetch current price from MEXC API"""
     try:
-        if not symbol.endswith('USDT'):
-            symbol = f"{symbol}USDT"
-        
-        # MEXC uses underscore format for futures
-        mexc_symbol = symbol.replace('USDT', '_USDT')
-        url = f"https://contract.mexc.com/api/v1/contract/ticker?symbol={mexc_symbol}"
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if data.get('success') and data.get('data'):
-                        return float(data['data']['lastPrice'])
+        data = await fetch_json('mexc', _mexc_url(symbol))
+        if data and data.get('success') and data.get('data'):
+            return float(data['data']['lastPrice'])
         return None
     except Exception as e:
         logger.error(f"Error fetching MEXC price for {symbol}: {e}")
         return None
 
-async def get_price(symbol: str, exchange: str) -> float:
-    """Fetch price from specified exchange"""
+async def get_all_prices_binance() -> dict:
+    """Fetch prices for all symbols from Binance Futures API"""
+    try:
+        data = await fetch_json('binance', "https://fapi.binance.com/fapi/v1/ticker/price")
+        if data:
+            return {d['symbol']: float(d['price']) for d in data}
+        return {}
+    except Exception as e:
+        logger.error(f"Error fetching Binance prices: {e}")
+        return {}
+
+async def get_all_prices_bybit() -> dict:
+    """Fetch prices for all symbols from Bybit API"""
+    try:
+        data = await fetch_json('bybit', "https://api.bybit.com/v5/market/tickers?category=linear")
+        if data and data.get('retCode') == 0 and data.get('result', {}).get('list'):
+            return {d['symbol']: float(d['lastPrice']) for d in data['result']['list']}
+        return {}
+    except Exception as e:
+        logger.error(f"Error fetching Bybit prices: {e}")
+        return {}
+
+async def get_all_prices_bitget() -> dict:
+    """Fetch prices for all symbols from Bitget API"""
+    try:
+        data = await fetch_json('bitget', "https://api.bitget.com/api/v2/mix/market/tickers?productType=USDT-FUTURES")
+        if data and data.get('code') == '00000' and data.get('data'):
+            return {d['symbol']: float(d['lastPr']) for d in data['data']}
+        return {}
+    except Exception as e:
+        logger.error(f"Error fetching Bitget prices: {e}")
+        return {}
+
+async def get_all_prices_mexc() -> dict:
+    """Fetch prices for all symbols from MEXC API"""
+    try:
+        data = await fetch_json('mexc', "https://contract.mexc.com/api/v1/contract/ticker")
+        if data and data.get('success') and data.get('data'):
+            # MEXC uses underscore format for futures, e.g. BTC_USDT
+            return {d['symbol'].replace('_', ''): float(d['lastPrice']) for d in data['data']}
+        return {}
+    except Exception as e:
+        logger.error(f"Error fetching MEXC prices: {e}")
+        return {}
+
+# Price fetchers by exchange name
+_FETCHERS = {
+    'binance': get_binance_price,
+    'bybit': get_bybit_price,
+    'bitget': get_bitget_price,
+    'mexc': get_mexc_price
+}
+
+_BULK_FETCHERS = {
+    'binance': get_all_prices_binance,
+    'bybit': get_all_prices_bybit,
+    'bitget': get_all_prices_bitget,
+    'mexc': get_all_prices_mexc
+}
+
+async def get_all_prices(exchange: str) -> dict:
+    """Fetch prices for all symbols from specified exchange"""
+    fetcher = _BULK_FETCHERS.get(exchange.lower())
+    return await fetcher() if fetcher else {}
+
+def cache_price(symbol: str, exchange: str, price: float):
+    """Store a freshly fetched price in the cache"""
+    _price_cache[(symbol, exchange)] = (price, time.monotonic() + PRICE_CACHE_TTL)
+
+async def get_price(symbol: str, exchange: str, use_cache: bool = True) -> float:
+    """Fetch price from specified exchange, served from cache when fresh unless use_cache is False"""
     exchange = exchange.lower()
     
-    if exchange == 'binance':
-        return await get_binance_price(symbol)
-    elif exchange == 'bybit':
-        return await get_bybit_price(symbol)
-    elif exchange == 'bitget':
-        return await get_bitget_price(symbol)
-    elif exchange == 'mexc':
-        return await get_mexc_price(symbol)
-    else:
-        return None
+    key = (symbol, exchange)
+    cached = _price_cache.get(key)
+    if use_cache and cached is not None and time.monotonic() < cached[1]:
+        return cached[0]
+    
+    # Join an identical request that is already in flight
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fetch_price(symbol, exchange))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+    
+    # Shield so one cancelled caller does not cancel the shared request
+    price = await asyncio.shield(task)
+    if price is not None:
+        cache_price(symbol, exchange, price)
+    return price
+
+async def get_prices(pairs: list, use_cache: bool = True) -> dict:
+    """Fetch prices for (symbol, exchange) pairs concurrently"""
+    results = await asyncio.gather(
+        *(get_price(symbol, exchange, use_cache) for symbol, exchange in pairs),
+        return_exceptions=True
+    )
+    return {pair: price for pair, price in zip(pairs, results) if isinstance(price, float)}
+
+async def fetch_price(symbol: str, exchange: str) -> float:
+    """Fetch price from specified exchange"""
+    fetcher = _FETCHERS.get(exchange)
+    return await fetcher(symbol) if fetcher else None
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send welcome message"""
@@ -177,18 +579,21 @@ async def list_alerts(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("📭 No active alerts")
         return
     
-    message = "📊 Active Alerts:\n\n"
-    for alert_id, alert_data in active_alerts[chat_id].items():
-        symbol = alert_data['symbol']
-        target = alert_data['target']
-        initial = alert_data['initial']
-        exchange = alert_data['exchange']
-        current = await get_price(symbol, exchange)
-        current_str = f"${current:g}" if current else "N/A"
+    # Fetch current prices for all listed pairs concurrently
+    alerts = list(active_alerts[chat_id].values())
+    prices = await get_prices(list({(alert_data.symbol, alert_data.exchange) for alert_data in alerts}))
+    
+    lines = ["📊 Active Alerts:", ""]
+    for alert_data in alerts:
+        symbol = alert_data.symbol
+        target = alert_data.target
+        initial = alert_data.initial
+        current = prices.get((symbol, alert_data.exchange))
+        current_str = format_price(current) if current else "N/A"
         direction = "↓ below" if target < initial else "↑ above"
-        message += f"• {symbol} ({exchange.upper()}): {direction} ${target:g} (Current: {current_str})\n"
+        lines.append(f"• {symbol} ({alert_data.exchange_display}): {direction} {format_price(target)} (Current: {current_str})")
     
-    await update.message.reply_text(message)
+    await update.message.reply_text("\n".join(lines))
 
 async def remove_alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Remove alert for specific symbol"""
@@ -207,27 +612,22 @@ async def remove_alert(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Try to remove by alert ID number first
     try:
         alert_num = int(identifier)
-        alert_ids = list(active_alerts[chat_id].keys())
-        if 1 <= alert_num <= len(alert_ids):
-            alert_id = alert_ids[alert_num - 1]
-            symbol = active_alerts[chat_id][alert_id]['symbol']
-            del active_alerts[chat_id][alert_id]
-            save_alerts()
+        if 1 <= alert_num <= len(active_alerts[chat_id]):
+            # Alerts keep insertion order, so step to the Nth without copying the keys
+            alert_id = next(islice(active_alerts[chat_id], alert_num - 1, None))
+            symbol = delete_alert(chat_id, alert_id).symbol
             await update.message.reply_text(f"✅ Alert #{alert_num} removed for {symbol}")
             return
     except ValueError:
         pass
     
     # Try to remove by symbol name
-    removed = []
-    for alert_id, alert_data in list(active_alerts[chat_id].items()):
-        if alert_data['symbol'] == identifier or alert_data['symbol'] == f"{identifier}USDT":
-            removed.append(alert_id)
+    symbols = _symbol_index.get(chat_id, {})
+    removed = symbols.get(identifier, set()) | symbols.get(f"{identifier}USDT", set())
     
     if removed:
         for alert_id in removed:
-            del active_alerts[chat_id][alert_id]
-        save_alerts()
+            delete_alert(chat_id, alert_id)
         await update.message.reply_text(f"✅ Removed {len(removed)} alert(s) for {identifier}")
     else:
         await update.message.reply_text(f"❌ No alert found for {identifier}")
@@ -237,8 +637,8 @@ async def clear_alerts(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
     
     if chat_id in active_alerts:
-        active_alerts[chat_id] = {}
-        save_alerts()
+        for alert_id in list(active_alerts[chat_id]):
+            delete_alert(chat_id, alert_id)
         await update.message.reply_text("✅ All alerts cleared")
     else:
         await update.message.reply_text("📭 No alerts to clear")
@@ -249,9 +649,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     text = update.message.text.strip()
     
     # Parse input: SYMBOL PRICE [EXCHANGE]
-    parts = text.split()
+    match = ALERT_MESSAGE_RE.fullmatch(text)
     
-    if len(parts) < 2 or len(parts) > 3:
+    if not match:
         await update.message.reply_text(
             "❌ Invalid format.\n\n"
             "Simple: BTC 96000\n"
@@ -259,24 +659,25 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    symbol = parts[0].upper()
+    symbol, price_text, exchange = match.groups()
+    symbol = symbol.upper()
     
     # Auto-add USDT if not present
     if not symbol.endswith('USDT'):
         symbol = f"{symbol}USDT"
     
     try:
-        target_price = float(parts[1].replace(',', ''))
+        target_price = float(price_text.replace(',', ''))
     except ValueError:
         await update.message.reply_text("❌ Invalid price format")
         return
     
     # If exchange specified, use it directly
-    if len(parts) == 3:
-        exchange = parts[2].lower()
+    if exchange:
+        exchange = exchange.lower()
         
         # Validate exchange
-        if exchange not in ['binance', 'bybit', 'bitget', 'mexc']:
+        if exchange not in _FETCHERS:
             await update.message.reply_text(
                 "❌ Invalid exchange. Supported: binance, bybit, bitget, mexc"
             )
@@ -290,22 +691,10 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             'target': target_price
         }
         
-        keyboard = [
-            [
-                InlineKeyboardButton("Binance", callback_data=f"exchange_binance"),
-                InlineKeyboardButton("Bybit", callback_data=f"exchange_bybit")
-            ],
-            [
-                InlineKeyboardButton("Bitget", callback_data=f"exchange_bitget"),
-                InlineKeyboardButton("MEXC", callback_data=f"exchange_mexc")
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
         await update.message.reply_text(
-            f"📊 Setting alert for {symbol} at ${target_price:,.2f}\n\n"
+            f"📊 Setting alert for {symbol} at {format_price(target_price)}\n\n"
             f"Select exchange:",
-            reply_markup=reply_markup
+            reply_markup=EXCHANGE_SELECT_KEYBOARD
         )
 
 async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -341,37 +730,22 @@ async def set_alert(update: Update, chat_id: int, symbol: str, target_price: flo
         return
     
     # Store alert with unique ID
-    if chat_id not in active_alerts:
-        active_alerts[chat_id] = {}
-    
     alert_id = str(alert_counter)
     alert_counter += 1
     
-    active_alerts[chat_id][alert_id] = {
-        'symbol': symbol,
-        'target': target_price,
-        'initial': current_price,
-        'last_price': current_price,
-        'exchange': exchange
-    }
-    
-    # Save to file
-    save_alerts()
+    add_alert(chat_id, alert_id, Alert(
+        symbol=symbol,
+        target=target_price,
+        initial=current_price,
+        last_price=current_price,
+        exchange=exchange
+    ))
     
     # Determine direction symbol
     direction_symbol = "<" if target_price < current_price else ">"
     
-    # Exchange emojis
-    exchange_emojis = {
-        'binance': '🟡',
-        'bybit': '🟠',
-        'bitget': '🌐',
-        'mexc': '🔵'
-    }
-    exchange_emoji = exchange_emojis.get(exchange, '⚪')
-    
     await update.message.reply_text(
-        f"✅ Alert: {symbol}/{exchange.upper()} {direction_symbol} ${target_price:g}"
+        f"✅ Alert: {symbol}/{exchange.upper()} {direction_symbol} {format_price(target_price)}"
     )
 
 async def set_alert_from_callback(query, chat_id: int, symbol: str, target_price: float, exchange: str):
@@ -385,137 +759,259 @@ async def set_alert_from_callback(query, chat_id: int, symbol: str, target_price
         return
     
     # Store alert with unique ID
-    if chat_id not in active_alerts:
-        active_alerts[chat_id] = {}
-    
     alert_id = str(alert_counter)
     alert_counter += 1
     
-    active_alerts[chat_id][alert_id] = {
-        'symbol': symbol,
-        'target': target_price,
-        'initial': current_price,
-        'last_price': current_price,
-        'exchange': exchange
-    }
-    
-    # Save to file
-    save_alerts()
+    add_alert(chat_id, alert_id, Alert(
+        symbol=symbol,
+        target=target_price,
+        initial=current_price,
+        last_price=current_price,
+        exchange=exchange
+    ))
     
     # Determine direction symbol
     direction_symbol = "<" if target_price < current_price else ">"
     
-    # Exchange emojis
-    exchange_emojis = {
-        'binance': '🟡',
-        'bybit': '🟠',
-        'bitget': '🌐',
-        'mexc': '🔵'
-    }
-    exchange_emoji = exchange_emojis.get(exchange, '⚪')
-    
     await query.edit_message_text(
-        f"✅ Alert: {symbol}/{exchange.upper()} {direction_symbol} ${target_price:g}"
+        f"✅ Alert: {symbol}/{exchange.upper()} {direction_symbol} {format_price(target_price)}"
     )
 
 async def check_alerts(context: ContextTypes.DEFAULT_TYPE):
     """Background task to check all alerts"""
-    for chat_id, alerts in list(active_alerts.items()):
-        for alert_id, alert_data in list(alerts.items()):
-            symbol = alert_data['symbol']
-            target_price = alert_data['target']
-            initial_price = alert_data['initial']
-            last_price = alert_data.get('last_price', initial_price)
-            exchange = alert_data['exchange']
-            
-            current_price = await get_price(symbol, exchange)
-            
-            if current_price is None:
-                continue
-            
-            # Check if price CROSSED the target (must actually cross, not equal)
-            triggered = False
-            
-            # For downward alerts (target < initial)
-            if target_price < initial_price:
-                # Last price was above target, current is below (not equal)
-                if last_price > target_price and current_price < target_price:
-                    triggered = True
-            
-            # For upward alerts (target > initial)
-            elif target_price > initial_price:
-                # Last price was below target, current is above (not equal)
-                if last_price < target_price and current_price > target_price:
-                    triggered = True
+    if not _by_pair:
+        return
+    
+    # Fetch prices only for (symbol, exchange) pairs with at least one alert due for a check
+    now = time.monotonic()
+    due = {
+        pair for pair, owners in _by_pair.items()
+        if any(now >= active_alerts[chat_id][alert_id].next_check for chat_id, alert_id in owners)
+    }
+    if not due:
+        return
+    
+    # Exchanges watched for several symbols get one bulk ticker request,
+    # the rest get one point request per (symbol, exchange) pair
+    symbols_by_exchange = {}
+    for symbol, exchange in due:
+        symbols_by_exchange.setdefault(exchange, set()).add(symbol)
+    bulk_exchanges = [
+        exchange for exchange, symbols in symbols_by_exchange.items()
+        if len(symbols) >= BULK_MIN_SYMBOLS
+    ]
+    point_pairs = [
+        (symbol, exchange)
+        for exchange, symbols in symbols_by_exchange.items()
+        if len(symbols) < BULK_MIN_SYMBOLS
+        for symbol in symbols
+    ]
+    
+    # Point requests bypass the cache so polling always sees a fresh price;
+    # get_price caches what it fetches
+    bulk_results, point_prices = await asyncio.gather(
+        asyncio.gather(*(get_all_prices(exchange) for exchange in bulk_exchanges), return_exceptions=True),
+        get_prices(point_pairs, use_cache=False)
+    )
+    exchange_prices = {
+        exchange: prices
+        for exchange, prices in zip(bulk_exchanges, bulk_results)
+        if isinstance(prices, dict) and prices
+    }
+    
+    # Share the fresh bulk prices with /list and alert setup
+    expires_at = time.monotonic() + PRICE_CACHE_TTL
+    for exchange, prices in exchange_prices.items():
+        for symbol, price in prices.items():
+            _price_cache[(symbol, exchange)] = (price, expires_at)
+    
+    # If a bulk request failed, fetch each of its pairs once instead
+    missing = [
+        (symbol, exchange)
+        for exchange in bulk_exchanges
+        if exchange not in exchange_prices
+        for symbol in symbols_by_exchange[exchange]
+    ]
+    if missing:
+        point_prices.update(await get_prices(missing, use_cache=False))
+    for (symbol, exchange), price in point_prices.items():
+        exchange_prices.setdefault(exchange, {})[symbol] = price
+    
+    # Check every alert whose price was fetched, due or not, since the price is already here.
+    # The pair index is read after the fetch, so alerts removed meanwhile are not visited
+    triggered = []
+    for (symbol, exchange), owners in _by_pair.items():
+        current_price = exchange_prices.get(exchange, {}).get(symbol)
+        if current_price is None:
+            continue
+        
+        for chat_id, alert_id in owners:
+            alert_data = active_alerts[chat_id][alert_id]
+            target = alert_data.target
+            initial = alert_data.initial
+            last_price = alert_data.last_price
             
-            # Update last price
-            active_alerts[chat_id][alert_id]['last_price'] = current_price
+            # Check if price CROSSED the target (must actually cross, not equal):
+            # downward alerts need last above and current below the target,
+            # upward alerts need last below and current above the target
+            if ((target < initial and last_price > target and current_price < target)
+                    or (target > initial and last_price < target and current_price > target)):
+                triggered.append((chat_id, alert_id, alert_data, current_price, last_price))
             
-            if triggered:
-                from datetime import datetime
-                
-                direction = "dropped below" if target_price < initial_price else "rose above"
-                
-                # Exchange circle emojis (matching colors)
-                exchange_emojis = {
-                    'binance': '🟡',  # Yellow circle
-                    'bybit': '🟠',    # Orange circle
-                    'bitget': '🌐',   # Globe for Bitget
-                    'mexc': '🔵'      # Blue circle
-                }
-                
-                exchange_emoji = exchange_emojis.get(exchange, '🤍')
-                
-                # Coin emoji - green if up, red if down
-                coin_emoji = '🟢' if current_price > target_price else '🔴'
-                
-                # Get current time
-                current_time = datetime.now().strftime('%H:%M:%S')
-                
-                message = (
-                    f"{coin_emoji} `${symbol}`\n"
-                    f"{exchange_emoji} {exchange.upper()}\n\n"
-                    f"_Target price: ${target_price:g}_\n"
-                    f"_Current price: ${current_price:g}_\n\n"
-                    f"🕓 {current_time}"
-                )
-                
-                # Create button for the alert
-                exchange_urls = {
-                    'binance': f"https://www.binance.com/en/futures/{symbol}",
-                    'bybit': f"https://www.bybit.com/trade/usdt/{symbol}",
-                    'bitget': f"https://www.bitget.com/en/futures/usdt/{symbol}",
-                    'mexc': f"https://futures.mexc.com/exchange/{symbol.replace('USDT', '_USDT')}"
-                }
-                
-                keyboard = [
-                    [InlineKeyboardButton(f"🔗 {exchange.upper()}", url=exchange_urls.get(exchange, "https://www.binance.com"))]
-                ]
-                reply_markup = InlineKeyboardMarkup(keyboard)
-                
-                try:
-                    await context.bot.send_message(
-                        chat_id=chat_id, 
-                        text=message,
-                        reply_markup=reply_markup,
-                        parse_mode='Markdown'
-                    )
-                    
-                    # Remove triggered alert
-                    del active_alerts[chat_id][alert_id]
-                    save_alerts()
-                except Exception as e:
-                    logger.error(f"Error sending alert: {e}")
+            # Update last price and schedule the next check by distance to target
+            alert_data.last_price = current_price
+            distance = abs(current_price - target) / target if target else 0.0
+            if distance < NEAR_TARGET_DISTANCE:
+                alert_data.next_check = now + NEAR_TARGET_INTERVAL
+            elif distance < MID_TARGET_DISTANCE:
+                alert_data.next_check = now + MID_TARGET_INTERVAL
+            else:
+                alert_data.next_check = now + FAR_TARGET_INTERVAL
+    
+    # Build notifications for triggered alerts
+    notifications = []
+    for chat_id, alert_id, alert_data, current_price, last_price in triggered:
+        symbol = alert_data.symbol
+        target_price = alert_data.target
+        initial_price = alert_data.initial
+        exchange = alert_data.exchange
+        
+        from datetime import datetime
+        
+        direction = "dropped below" if target_price < initial_price else "rose above"
+        
+        exchange_emoji = EXCHANGE_EMOJIS.get(exchange, '🤍')
+        
+        # Coin emoji - green if up, red if down
+        coin_emoji = '🟢' if current_price > target_price else '🔴'
+        
+        # Get current time
+        current_time = datetime.now().strftime('%H:%M:%S')
+        
+        message = (
+            f"{coin_emoji} `${symbol}`\n"
+            f"{exchange_emoji} {alert_data.exchange_display}\n\n"
+            f"_Target price: {format_price(target_price)}_\n"
+            f"_Current price: {format_price(current_price)}_\n\n"
+            f"🕓 {current_time}"
+        )
+        
+        # Create button for the alert
+        url_template = EXCHANGE_URL_TEMPLATES.get(exchange)
+        exchange_url = url_template.format(alert_data.url_symbol) if url_template else "https://www.binance.com"
+        
+        keyboard = [
+            [InlineKeyboardButton(f"🔗 {alert_data.exchange_display}", url=exchange_url)]
+        ]
+        reply_markup = InlineKeyboardMarkup(keyboard)
+        
+        notifications.append((chat_id, alert_id, message, reply_markup, alert_data, last_price))
+    
+    if not notifications:
+        return
+    
+    # Send all notifications concurrently
+    results = await asyncio.gather(
+        *(
+            context.bot.send_message(
+                chat_id=chat_id,
+                text=message,
+                reply_markup=reply_markup,
+                parse_mode='Markdown'
+            )
+            for chat_id, _, message, reply_markup, _, _ in notifications
+        ),
+        return_exceptions=True
+    )
+    
+    for (chat_id, alert_id, _, _, alert_data, last_price), result in zip(notifications, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error sending alert: {result}")
+            # Restore the pre-crossing price so the alert fires again on the next check
+            alert_data.last_price = last_price
+            continue
+        
+        # Remove triggered alert
+        delete_alert(chat_id, alert_id)
+
+async def warm_up_connection(url: str):
+    """Make a single request to an exchange, without retries"""
+    session = await get_session()
+    timeout = aiohttp.ClientTimeout(total=WARM_UP_TIMEOUT)
+    async with session.get(url, timeout=timeout) as response:
+        await response.read()
+
+async def warm_up_connections():
+    """Resolve and connect to every exchange so the first poll skips DNS and TLS setup"""
+    exchanges = list(EXCHANGE_PING_URLS)
+    results = await asyncio.gather(
+        *(warm_up_connection(EXCHANGE_PING_URLS[exchange]) for exchange in exchanges),
+        return_exceptions=True
+    )
+    for exchange, result in zip(exchanges, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Could not warm up connection to {exchange.upper()}: {result}")
+
+async def post_init(application: Application):
+    """Open shared resources once the event loop is running"""
+    global _warm_up_task
+    
+    await get_session()
+    # Warm up in the background so an unreachable exchange cannot delay startup
+    _warm_up_task = asyncio.create_task(warm_up_connections())
+
+async def post_shutdown(application: Application):
+    """Release shared resources on shutdown"""
+    if _warm_up_task is not None and not _warm_up_task.done():
+        _warm_up_task.cancel()
+        try:
+            await _warm_up_task
+        except asyncio.CancelledError:
+            pass
+    
+    # Last prices are only kept in memory while running, so persist them once here
+    _changed.update(
+        (chat_id, alert_id)
+        for chat_id, alerts in active_alerts.items()
+        for alert_id in alerts
+    )
+    if _changed:
+        await write_alerts()
+    if _db is not None:
+        _db.close()
+    await close_session()
+
+def install_uvloop():
+    """Use uvloop as the event loop when available (POSIX only)"""
+    if sys.platform == 'win32':
+        return
+    
+    try:
+        import uvloop
+    except ImportError:
+        return
+    
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    logger.info("Using uvloop event loop")
 
 def main():
     """Start the bot"""
     TOKEN = os.getenv("TOKEN")
     
+    # Switch event loop before the application creates one
+    install_uvloop()
+    
     # Load saved data
     load_data()
     
     # Create application
-    app = Application.builder().token(TOKEN).build()
+    app = (
+        Application.builder()
+        .token(TOKEN)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     # Add handlers
     app.add_handler(CommandHandler("start", start))
@@ -525,8 +1021,11 @@ def main():
     app.add_handler(CallbackQueryHandler(button_callback))
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     
-    # Add job to check alerts every 10 seconds
-    app.job_queue.run_repeating(check_alerts, interval=10, first=10)
+    # Add job to check due alerts every few seconds
+    app.job_queue.run_repeating(check_alerts, interval=POLL_INTERVAL, first=POLL_INTERVAL)
+    
+    # Add job to write changed alerts to the database at most once per second
+    app.job_queue.run_repeating(flush_alerts, interval=1, first=1)
     
     # Start bot
     print("Bot started! Press Ctrl+C to stop.")